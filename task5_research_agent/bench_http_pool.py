@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Tuple
+
+from http_pool import PoolStats, build_http_client
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """Tiny keep-alive endpoint standing in for a model / search API."""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without this, Nagle plus
+    # delayed ACKs add ~40ms to every keep-alive response.
+    disable_nagle_algorithm = True
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+def start_stub_server() -> Tuple[ThreadingHTTPServer, str]:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}"
+
+
+async def _one_run(client, url: str, calls: int) -> None:
+    # A research run is a handful of sequential model / tool round-trips.
+    for _ in range(calls):
+        response = await client.post(url, json={"q": "stub"})
+        response.raise_for_status()
+
+
+async def bench(url: str, runs: int, calls: int) -> dict:
+    fresh_stats = PoolStats()
+    fresh: List[float] = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        async with build_http_client(http2=False, stats=fresh_stats) as client:
+            await _one_run(client, url, calls)
+        fresh.append(time.perf_counter() - start)
+
+    shared_stats = PoolStats()
+    shared: List[float] = []
+    async with build_http_client(http2=False, stats=shared_stats) as client:
+        for _ in range(runs):
+            start = time.perf_counter()
+            await _one_run(client, url, calls)
+            shared.append(time.perf_counter() - start)
+
+    fresh_ms = sum(fresh) / runs * 1e3
+    shared_ms = sum(shared) / runs * 1e3
+    return {
+        "runs": runs,
+        "calls_per_run": calls,
+        "fresh_client_ms_per_run": fresh_ms,
+        "shared_client_ms_per_run": shared_ms,
+        "saved_ms_per_run": fresh_ms - shared_ms,
+        "fresh_pool": fresh_stats.as_dict(),
+        "shared_pool": shared_stats.as_dict(),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare a fresh HTTP client per run against the shared pooled client"
+    )
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--calls", type=int, default=4, help="HTTP round-trips per run")
+    args = parser.parse_args()
+
+    server, url = start_stub_server()
+    try:
+        result = asyncio.run(bench(url, args.runs, args.calls))
+    finally:
+        server.shutdown()
+    # The stub is plain HTTP on loopback, so this only shows TCP setup and
+    # client construction; against a real TLS endpoint the gap is larger.
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
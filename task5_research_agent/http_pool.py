@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import importlib.util
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+import httpx
+
+# HTTP/2 needs the optional `h2` package (pip install "httpx[http2]").
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+@dataclass
+class PoolStats:
+    """Connection-reuse counters for a pooled client."""
+
+    requests: int = 0
+    new_connections: int = 0
+
+    @property
+    def reused(self) -> int:
+        return max(0, self.requests - self.new_connections)
+
+    @property
+    def reuse_ratio(self) -> float:
+        return self.reused / self.requests if self.requests else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "new_connections": self.new_connections,
+            "reused": self.reused,
+            "reuse_ratio": round(self.reuse_ratio, 3),
+        }
+
+
+def build_http_client(
+    max_connections: int = 20,
+    max_keepalive_connections: int = 10,
+    keepalive_expiry: float = 30.0,
+    timeout: float = 60.0,
+    http2: Optional[bool] = None,
+    stats: Optional[PoolStats] = None,
+) -> httpx.AsyncClient:
+    """
+    Create one keep-alive AsyncClient meant to be shared across research runs.
+
+    HTTP/2 is used when `h2` is installed (unless `http2=False`). If `stats`
+    is given, every request bumps `stats.requests` and every freshly opened
+    TCP connection bumps `stats.new_connections`, via httpcore's trace hook.
+    """
+    limits = httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_keepalive_connections,
+        keepalive_expiry=keepalive_expiry,
+    )
+
+    event_hooks = {}
+    if stats is not None:
+
+        async def trace(event_name: str, info: Dict[str, Any]) -> None:
+            if event_name == "connection.connect_tcp.complete":
+                stats.new_connections += 1
+
+        async def on_request(request: httpx.Request) -> None:
+            stats.requests += 1
+            request.extensions["trace"] = trace
+
+        event_hooks["request"] = [on_request]
+
+    return httpx.AsyncClient(
+        limits=limits,
+        timeout=timeout,
+        http2=HTTP2_AVAILABLE if http2 is None else http2,
+        event_hooks=event_hooks,
+    )
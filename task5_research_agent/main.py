@@ -1,16 +1,29 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
 import os
+import time
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 
+import httpx
 import logfire
 from pydantic_ai import Agent, Tool
+from pydantic_ai.exceptions import UsageLimitExceeded
+from pydantic_ai.usage import UsageLimits
 
+from http_pool import PoolStats, build_http_client
 from logfire_instrumentation import configure_logfire
-from models import ResearchContext, ResearchDependencies, ResearchSummary
-from tools import summarize_snippets, web_search
+from models import (
+    DeadlineExceeded,
+    ResearchContext,
+    ResearchDependencies,
+    ResearchReport,
+    ResearchSummary,
+)
+from prefetch import SearchPrefetch
+from tools import search_backend, summarize_snippets, summarize_texts, web_search
 os.environ["MODEL"] = "google-gla:gemini-2.5-flash"
 
 
@@ -27,7 +40,63 @@ def build_model_name() -> str:
     return os.getenv("MODEL", "google-gla:gemini-2.5-flash")
 
 
-def build_agent() -> Agent[ResearchDependencies, ResearchSummary]:
+# Default end-to-end budget for one run; override with RESEARCH_TIMEOUT_S.
+DEFAULT_TIMEOUT_S = float(os.getenv("RESEARCH_TIMEOUT_S", "60"))
+
+# Rough cost of one model round-trip, used to turn the remaining budget
+# into a cap on model requests (and so on tool turns).
+EST_SECONDS_PER_TURN = 5.0
+MIN_MODEL_REQUESTS = 3
+MAX_MODEL_REQUESTS = 8
+
+# Opt-in speculative web_search on the raw question (see prefetch.py).
+PREFETCH_DEFAULT = os.getenv("RESEARCH_PREFETCH", "0") == "1"
+# Also summarize the prefetched snippets ahead of a summarize_snippets call.
+PREFETCH_SUMMARY_DEFAULT = os.getenv("RESEARCH_PREFETCH_SUMMARY", "0") == "1"
+
+# One pooled keep-alive client (and the agent built on it) per process, so
+# repeated runs reuse warm TLS connections instead of reconnecting.
+_http_stats = PoolStats()
+_http_client: Optional[httpx.AsyncClient] = None
+_agent: Optional[Agent[ResearchDependencies, ResearchSummary]] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared pooled HTTP client, creating it on first use."""
+    global _http_client
+    if _http_client is None:
+        _http_client = build_http_client(stats=_http_stats)
+    return _http_client
+
+
+def build_model(model_name: str, http_client: Optional[httpx.AsyncClient] = None):
+    """
+    Build the model object for `model_name`.
+
+    For google-gla models the provider is given our shared client; any
+    other provider string is passed through to pydantic-ai unchanged.
+    """
+    provider_name, _, name = model_name.partition(":")
+    if http_client is None or provider_name != "google-gla":
+        return model_name
+
+    from pydantic_ai.models.google import GoogleModel
+    from pydantic_ai.providers.google import GoogleProvider
+
+    return GoogleModel(name, provider=GoogleProvider(http_client=http_client))
+
+
+def get_agent() -> Agent[ResearchDependencies, ResearchSummary]:
+    """Return the process-wide research agent, built on the shared client."""
+    global _agent
+    if _agent is None:
+        _agent = build_agent(get_http_client())
+    return _agent
+
+
+def build_agent(
+    http_client: Optional[httpx.AsyncClient] = None,
+) -> Agent[ResearchDependencies, ResearchSummary]:
     """
     Create the Pydantic-AI research agent.
 
@@ -41,6 +110,7 @@ def build_agent() -> Agent[ResearchDependencies, ResearchSummary]:
     """
 
     model_name = build_model_name()
+    model = build_model(model_name, http_client)
 
     tools: List[Tool[ResearchDependencies]] = [
         Tool(web_search),
@@ -59,7 +129,7 @@ def build_agent() -> Agent[ResearchDependencies, ResearchSummary]:
     )
 
     agent: Agent[ResearchDependencies, ResearchSummary] = Agent(
-        model_name,
+        model,
         deps_type=ResearchDependencies,
         output_type=ResearchSummary,
         instructions=instructions,
@@ -69,42 +139,149 @@ def build_agent() -> Agent[ResearchDependencies, ResearchSummary]:
     return agent
 
 
-def run_research(question: str) -> ResearchSummary:
+def _usage_limits(deps: ResearchDependencies) -> UsageLimits:
+    """Cap model requests by how many turns fit in the remaining budget."""
+    remaining = deps.remaining()
+    if remaining is None:
+        return UsageLimits(request_limit=MAX_MODEL_REQUESTS)
+    # At least three requests: search, summarize, then write the answer.
+    turns = int(remaining // EST_SECONDS_PER_TURN)
+    return UsageLimits(request_limit=max(MIN_MODEL_REQUESTS, min(MAX_MODEL_REQUESTS, turns)))
+
+
+def _partial_summary(question: str, deps: ResearchDependencies, reason: str) -> ResearchReport:
+    """Best-effort answer built from whatever the tools collected in time."""
+    return ResearchReport(
+        question=question,
+        short_answer=(
+            "The research run stopped before the model produced a final answer. "
+            "Below are the sources gathered so far, unsynthesized."
+        ),
+        key_points=[f"{r.title}: {r.snippet}" for r in deps.collected],
+        assumptions=[f"Incomplete run ({reason}); findings have not been cross-checked."],
+        sources=[r.url for r in deps.collected],
+        num_snippets=len(deps.collected),
+        incomplete=True,
+    )
+
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _run_until_complete(coro):
+    """
+    Run `coro` on one long-lived event loop, so the shared HTTP client's
+    pooled connections stay usable across runs.
+    """
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+    return _loop.run_until_complete(coro)
+
+
+async def _run_agent(
+    agent: Agent[ResearchDependencies, ResearchSummary],
+    question: str,
+    deps: ResearchDependencies,
+    timeout: float,
+):
+    """Run the agent under the deadline, with the prefetch (if any) overlapping it."""
+    if deps.prefetch is not None:
+        deps.prefetch.start(
+            lambda query: search_backend(query, deps.max_snippets),
+            summarize=summarize_texts,
+        )
+    try:
+        return await asyncio.wait_for(
+            agent.run(question, deps=deps, usage_limits=_usage_limits(deps)),
+            timeout=timeout,
+        )
+    finally:
+        if deps.prefetch is not None:
+            await deps.prefetch.cancel()
+
+
+def run_research(
+    question: str,
+    timeout: Optional[float] = None,
+    prefetch: Optional[bool] = None,
+    prefetch_summary: Optional[bool] = None,
+) -> ResearchReport:
     """
     Top-level orchestration for a single research run.
 
     This function is what you'd typically call from a CLI, scheduled job,
     or web handler.
+
+    The run gets a deadline `timeout` seconds out (DEFAULT_TIMEOUT_S if
+    not given). It is passed to tools through the deps, caps the number of
+    model requests, and cancels an in-flight model or tool call when it
+    passes. A run that times out returns a partial report with
+    `incomplete=True`.
+
+    With `prefetch` (default: RESEARCH_PREFETCH=1) the question is searched
+    speculatively while the first model call is in flight. With
+    `prefetch_summary` (default: RESEARCH_PREFETCH_SUMMARY=1) the prefetched
+    snippets are summarized speculatively as well.
     """
     configure_logfire()
 
     ctx = ResearchContext(question=question, started_at=datetime.utcnow())
     logfire.info("research.start", question=question)
 
-    agent = build_agent()
+    agent = get_agent()
 
-    deps = ResearchDependencies(max_snippets=5)
-
-    # Run synchronously for CLI simplicity.
-    result = agent.run_sync(question, deps=deps)
+    timeout = DEFAULT_TIMEOUT_S if timeout is None else timeout
+    deps = ResearchDependencies(
+        max_snippets=5,
+        http_client=get_http_client(),
+        deadline=time.monotonic() + timeout,
+    )
+    if PREFETCH_DEFAULT if prefetch is None else prefetch:
+        deps.prefetch = SearchPrefetch(
+            question,
+            summarize=PREFETCH_SUMMARY_DEFAULT if prefetch_summary is None else prefetch_summary,
+        )
+
+    try:
+        result = _run_until_complete(_run_agent(agent, question, deps, timeout))
+        summary = ResearchReport.from_summary(result.output)
+    except asyncio.TimeoutError:
+        ctx.incomplete_reason = f"deadline of {timeout:.1f}s exceeded during {deps.current_step or 'model call'}"
+    except DeadlineExceeded as exc:
+        ctx.incomplete_reason = str(exc)
+    except UsageLimitExceeded as exc:
+        ctx.incomplete_reason = f"turn budget exhausted: {exc}"
+
+    if ctx.incomplete_reason is not None:
+        summary = _partial_summary(question, deps, ctx.incomplete_reason)
+        logfire.warning(
+            "research.timeout",
+            question=ctx.question,
+            reason=ctx.incomplete_reason,
+            num_snippets=summary.num_snippets,
+        )
 
     # Compute how many snippets were used by inspecting tool calls.
     # Universal version — snippet count comes from summarizer tool
-    ctx.num_snippets = getattr(result.output, "num_snippets", 0)
+    ctx.num_snippets = getattr(summary, "num_snippets", 0)
     ctx.mark_completed()
 
     logfire.info(
         "research.completed",
         question=ctx.question,
         num_snippets=ctx.num_snippets,
+        incomplete=summary.incomplete,
         started_at=ctx.started_at.isoformat(),
         completed_at=ctx.completed_at.isoformat() if ctx.completed_at else None,
+        http_pool=_http_stats.as_dict(),
+        prefetch=deps.prefetch.stats.as_dict() if deps.prefetch is not None else None,
     )
 
     # Also append a simple text log for the assessment.
-    _append_sample_log(ctx, result.output)
+    _append_sample_log(ctx, summary)
 
-    return result.output
+    return summary
 
 
 def _append_sample_log(ctx: ResearchContext, summary: ResearchSummary) -> None:
@@ -117,6 +294,7 @@ def _append_sample_log(ctx: ResearchContext, summary: ResearchSummary) -> None:
         f"Completed at:  {ctx.completed_at.isoformat() if ctx.completed_at else 'N/A'}",
         f"Question:      {ctx.question}",
         f"Snippets used: {ctx.num_snippets}",
+        *([f"Incomplete:    {ctx.incomplete_reason}"] if ctx.incomplete_reason else []),
         "",
         "Short answer:",
         summary.short_answer,
@@ -133,12 +311,14 @@ def _append_sample_log(ctx: ResearchContext, summary: ResearchSummary) -> None:
         f.write("\n".join(lines))
 
 
-def _pretty_print(summary: ResearchSummary) -> None:
+def _pretty_print(summary: ResearchReport) -> None:
     """Print the research result in a CLI-friendly format."""
     print("\n" + "=" * 60)
     print("RESEARCH QUESTION")
     print("=" * 60)
     print(summary.question)
+    if summary.incomplete:
+        print("\n[INCOMPLETE] The run hit its deadline; this is a partial answer.")
     print("\n" + "=" * 60)
     print("SHORT ANSWER")
     print("=" * 60)
@@ -168,9 +348,33 @@ def main() -> None:
         type=str,
         help="Research question to ask the agent",
     )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=None,
+        help=f"End-to-end deadline in seconds (default: {DEFAULT_TIMEOUT_S:g})",
+    )
+
+    parser.add_argument(
+        "--prefetch",
+        action="store_true",
+        default=None,
+        help="Speculatively search the raw question during the first model call",
+    )
+    parser.add_argument(
+        "--prefetch-summary",
+        action="store_true",
+        default=None,
+        help="With --prefetch, also summarize the prefetched snippets speculatively",
+    )
     args = parser.parse_args()
 
-    summary = run_research(args.question)
+    summary = run_research(
+        args.question,
+        timeout=args.timeout,
+        prefetch=args.prefetch,
+        prefetch_summary=args.prefetch_summary,
+    )
     _pretty_print(summary)
 
 
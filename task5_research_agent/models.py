@@ -1,11 +1,16 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import time
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import List, Optional
+from typing import TYPE_CHECKING, List, Optional
 
+import httpx
 from pydantic import BaseModel, Field
 
+if TYPE_CHECKING:
+    from prefetch import SearchPrefetch
+
 
 class SearchResult(BaseModel):
     """Single mock search result."""
@@ -31,6 +36,26 @@ class ResearchSummary(BaseModel):
     )
     num_snippets: int = 0
 
+
+class ResearchReport(ResearchSummary):
+    """
+    What `run_research` returns: the model's summary plus run metadata.
+
+    Kept separate from ResearchSummary so orchestrator-only fields never
+    show up in the schema the model is asked to fill.
+    """
+
+    incomplete: bool = False
+
+    @classmethod
+    def from_summary(cls, summary: ResearchSummary, **extra) -> "ResearchReport":
+        return cls(**summary.model_dump(), **extra)
+
+
+class DeadlineExceeded(Exception):
+    """Raised by tools when the run's deadline has already passed."""
+
+
 @dataclass
 class ResearchDependencies:
     """
@@ -40,10 +65,47 @@ class ResearchDependencies:
     - HTTP clients
     - Vector DB handle
     - Configuration flags
+
+    `http_client` is the process-wide pooled client (see http_pool.py),
+    shared with the model provider; tools that call real backends should
+    use it instead of opening their own connections.
+
+    `deadline` is a time.monotonic() timestamp for the whole run. Tools
+    check it before doing work, record the step they are in, and `collect`
+    what they found (deduplicated by URL) so a timed-out run can still
+    return a partial answer.
+
+    `prefetch`, when set, holds a speculative search on the raw question
+    that `web_search` / `summarize_snippets` consult before doing the work.
     """
 
     max_snippets: int = 5
     created_at: datetime = datetime.utcnow()
+    http_client: Optional[httpx.AsyncClient] = None
+    deadline: Optional[float] = None
+    current_step: Optional[str] = None
+    collected: List[SearchResult] = field(default_factory=list)
+    prefetch: Optional["SearchPrefetch"] = None
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left before the deadline (never negative), or None."""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def check_deadline(self, step: str) -> None:
+        """Enter `step`, raising DeadlineExceeded if no time is left."""
+        self.current_step = step
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            raise DeadlineExceeded(f"deadline exceeded before {step}")
+
+    def collect(self, results: List[SearchResult]) -> None:
+        """Add `results` to `collected`, skipping URLs already there."""
+        seen = {r.url for r in self.collected}
+        for result in results:
+            if result.url not in seen:
+                seen.add(result.url)
+                self.collected.append(result)
 
 
 @dataclass
@@ -54,6 +116,7 @@ class ResearchContext:
     started_at: datetime
     completed_at: Optional[datetime] = None
     num_snippets: int = 0
+    incomplete_reason: Optional[str] = None
 
     def mark_completed(self) -> None:
         self.completed_at = datetime.utcnow()
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from models import SearchResult
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+# Query words ignored when comparing the raw question to the model's query.
+STOPWORDS = {
+    "a", "an", "the", "of", "in", "on", "for", "to", "and", "or", "is", "are",
+    "will", "how", "what", "why", "does", "do", "next", "years", "with",
+}
+
+
+def query_terms(text: str) -> frozenset:
+    return frozenset(w for w in _WORD.findall(text.lower()) if w not in STOPWORDS)
+
+
+@dataclass
+class PrefetchStats:
+    """Per-run prefetch outcome, logged with research.completed."""
+
+    hits: int = 0
+    misses: int = 0
+    summary_hits: int = 0
+    saved_s: float = 0.0
+    used: bool = False
+
+    def as_dict(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "summary_hits": self.summary_hits,
+            "saved_ms": round(self.saved_s * 1e3, 1),
+            "wasted": not self.used,
+        }
+
+
+class SearchPrefetch:
+    """
+    Speculative `web_search` on the raw question, started alongside the
+    first model call.
+
+    When the model later calls `web_search`, a query whose terms overlap
+    the question's by at least `min_overlap` (Jaccard) is answered from the
+    prefetch task instead of searching again. With `summarize` the snippets
+    are summarized ahead of time too, for a matching `summarize_snippets`
+    call.
+    """
+
+    def __init__(self, question: str, min_overlap: float = 0.5, summarize: bool = False) -> None:
+        self.question = question
+        self.min_overlap = min_overlap
+        self.summarize = summarize
+        self.stats = PrefetchStats()
+        self._terms = query_terms(question)
+        self._task: Optional["asyncio.Task[List[SearchResult]]"] = None
+        self._started = 0.0
+        self._finished: Optional[float] = None
+        self._summary: Optional[Tuple[Tuple[str, ...], dict]] = None
+
+    def start(
+        self,
+        search: Callable[[str], Awaitable[List[SearchResult]]],
+        summarize: Optional[Callable[[List[str]], dict]] = None,
+    ) -> None:
+        """
+        Kick off the search; must be called from inside the run's event loop.
+        `summarize` is only used if the prefetch was created with summarize=True.
+        """
+        if not self.summarize:
+            summarize = None
+
+        async def run() -> List[SearchResult]:
+            results = await search(self.question)
+            self._finished = time.monotonic()
+            if summarize is not None:
+                snippets = [r.snippet for r in results]
+                self._summary = (_snippet_key(snippets), summarize(snippets))
+            return results
+
+        self._started = time.monotonic()
+        self._task = asyncio.ensure_future(run())
+
+    def matches(self, query: str) -> bool:
+        terms = query_terms(query)
+        union = terms | self._terms
+        return bool(union) and len(terms & self._terms) / len(union) >= self.min_overlap
+
+    async def search(self, query: str) -> Optional[List[SearchResult]]:
+        """Prefetched results for `query`, or None on a miss."""
+        if self._task is None or not self.matches(query):
+            self.stats.misses += 1
+            return None
+
+        requested = time.monotonic()
+        try:
+            results = await self._task
+        except Exception:
+            self.stats.misses += 1
+            return None
+
+        self.stats.hits += 1
+        self.stats.used = True
+        # Time the search ran before the model asked for it.
+        done = self._finished if self._finished is not None else requested
+        self.stats.saved_s += max(0.0, min(requested, done) - self._started)
+        return results
+
+    def summary(self, snippets: List[str]) -> Optional[dict]:
+        """Pre-computed summary if `snippets` are exactly the prefetched ones."""
+        if self._summary is not None and self._summary[0] == _snippet_key(snippets):
+            self.stats.summary_hits += 1
+            return self._summary[1]
+        return None
+
+    async def cancel(self) -> None:
+        """
+        Stop the speculative search if the run ended without needing it,
+        and wait for it so no pending or failed task outlives the run.
+        """
+        if self._task is None:
+            return
+        self._task.cancel()
+        # Awaiting also retrieves a failure, avoiding "Task exception was
+        # never retrieved" on the long-lived loop.
+        with contextlib.suppress(asyncio.CancelledError, Exception):
+            await self._task
+
+
+def _snippet_key(snippets: List[str]) -> Tuple[str, ...]:
+    return tuple(" ".join(s.split()) for s in snippets)
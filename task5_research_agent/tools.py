@@ -14,7 +14,25 @@ async def web_search(
     """
     Mock web search tool.
     """
-    max_snippets = max(1, min(ctx.deps.max_snippets, 5))
+    ctx.deps.check_deadline("web_search")
+
+    results = None
+    if ctx.deps.prefetch is not None:
+        results = await ctx.deps.prefetch.search(query)
+    if results is None:
+        results = await search_backend(query, ctx.deps.max_snippets)
+
+    ctx.deps.collect(results)
+    ctx.deps.current_step = None
+    return results
+
+
+async def search_backend(query: str, max_snippets: int = 5) -> List[SearchResult]:
+    """
+    The search itself, without RunContext, so it can also run as a
+    speculative prefetch before the model asks for it.
+    """
+    max_snippets = max(1, min(max_snippets, 5))
 
     base_results = [
         SearchResult(
@@ -70,6 +88,20 @@ async def summarize_snippets(
     """
     Summarize snippets AND return snippet count.
     """
+    ctx.deps.check_deadline("summarize_snippets")
+
+    summary = None
+    if ctx.deps.prefetch is not None:
+        summary = ctx.deps.prefetch.summary(snippets)
+    if summary is None:
+        summary = summarize_texts(snippets)
+
+    ctx.deps.current_step = None
+    return summary
+
+
+def summarize_texts(snippets: List[str]) -> dict:
+    """Deduplicate, merge and trim snippets; shared by the tool and prefetch."""
     unique = []
     for s in snippets:
         norm = " ".join(s.split())
@@ -192,8 +192,8 @@ class UIAgent:
         )
 
 
-if __name__ == "__main__":
-    # Simple manual test loop
+def _interactive() -> None:
+    """Simple manual test loop."""
     agent = UIAgent()
     print("E-commerce UI Agent. Type 'exit' to quit.\n")
 
@@ -205,3 +205,37 @@ if __name__ == "__main__":
         print("\nAgent:\n" + reply)
         print("\n[DEBUG UI STATE]", state.model_dump())
         print("\n" + "-" * 60 + "\n")
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="E-commerce UI Agent")
+    parser.add_argument(
+        "--replay",
+        type=str,
+        default=None,
+        help="JSONL file of recorded sessions to replay non-interactively",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes for --replay (default: CPU count)",
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        default=None,
+        help="Write per-session final states and diffs here as JSONL",
+    )
+    args = parser.parse_args()
+
+    if args.replay:
+        from replay import replay_file
+
+        summary = replay_file(args.replay, workers=args.workers, output_path=args.output)
+        print(json.dumps(summary, indent=2))
+    else:
+        _interactive()
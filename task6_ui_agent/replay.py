@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional
+
+from agent import UIAgent
+
+
+def load_transcripts(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Read recorded sessions from a JSONL file, one session per line:
+
+        {"session_id": "s1", "messages": ["add iphone", "checkout"],
+         "expected_state": {...}}
+
+    `session_id` defaults to the line number and `expected_state` is optional.
+    It may be partial, e.g. {"current_view": "cart"}: only the fields it
+    lists are checked.
+    """
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            record.setdefault("session_id", str(line_no))
+            yield record
+
+
+def diff_states(expected: Any, actual: Any, path: str = "") -> List[Dict[str, Any]]:
+    """
+    Return a flat list of {path, expected, actual} differences.
+
+    Keys missing from an `expected` dict are not checked, so an expectation
+    can pin just the fields it cares about. Lists are compared in full.
+    """
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        diffs = []
+        for key in sorted(expected):
+            child = f"{path}.{key}" if path else key
+            diffs.extend(diff_states(expected.get(key), actual.get(key), child))
+        return diffs
+
+    if isinstance(expected, list) and isinstance(actual, list):
+        diffs = []
+        for i in range(max(len(expected), len(actual))):
+            exp = expected[i] if i < len(expected) else None
+            act = actual[i] if i < len(actual) else None
+            diffs.extend(diff_states(exp, act, f"{path}[{i}]"))
+        return diffs
+
+    if expected != actual:
+        return [{"path": path, "expected": expected, "actual": actual}]
+    return []
+
+
+def replay_session(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Replay one session through a fresh UIAgent. Runs inside a worker process."""
+    agent = UIAgent()
+    start = time.perf_counter()
+    for message in record.get("messages", []):
+        agent.handle_user_message(message)
+    elapsed = time.perf_counter() - start
+
+    final_state = agent.state.model_dump()
+    result: Dict[str, Any] = {
+        "session_id": record["session_id"],
+        "num_messages": len(record.get("messages", [])),
+        "elapsed_ms": elapsed * 1e3,
+        "final_state": final_state,
+    }
+    expected = record.get("expected_state")
+    if expected is not None:
+        result["diffs"] = diff_states(expected, final_state)
+    return result
+
+
+def replay_file(
+    path: str,
+    workers: Optional[int] = None,
+    output_path: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Replay every session in `path` across a process pool.
+
+    Per-session results are written as JSONL to `output_path` (if given);
+    the aggregate summary is returned.
+    """
+    records = list(load_transcripts(path))
+    workers = workers or os.cpu_count() or 1
+
+    start = time.perf_counter()
+    if workers == 1:
+        results = [replay_session(r) for r in records]
+    else:
+        # Big chunks keep IPC overhead low; sessions are tiny and many.
+        chunksize = max(1, len(records) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(replay_session, records, chunksize=chunksize))
+    wall_s = time.perf_counter() - start
+
+    if output_path:
+        with open(output_path, "w", encoding="utf-8") as f:
+            for result in results:
+                f.write(json.dumps(result, ensure_ascii=False) + "\n")
+
+    total_messages = sum(r["num_messages"] for r in results)
+    checked = [r for r in results if "diffs" in r]
+    latencies = sorted(r["elapsed_ms"] for r in results)
+    return {
+        "sessions": len(results),
+        "messages": total_messages,
+        "workers": workers,
+        "wall_s": wall_s,
+        "sessions_per_s": len(results) / wall_s if wall_s else 0.0,
+        "messages_per_s": total_messages / wall_s if wall_s else 0.0,
+        "session_p50_ms": latencies[len(latencies) // 2] if latencies else 0.0,
+        "session_p99_ms": latencies[int(len(latencies) * 0.99)] if latencies else 0.0,
+        "checked": len(checked),
+        "mismatched": sum(1 for r in checked if r["diffs"]),
+        "mismatched_sessions": [r["session_id"] for r in checked if r["diffs"]][:20],
+    }
@@ -1,15 +1,61 @@
 from __future__ import annotations
 
+import asyncio
+import contextlib
+import os
+import re
+import time
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import AsyncIterator, List, Optional, Set, Tuple
 
-import json
 from fastapi import FastAPI, Form, Request
-from fastapi.responses import HTMLResponse, PlainTextResponse
-
+from fastapi.responses import HTMLResponse, PlainTextResponse, Response
+from pydantic import BaseModel, Field
+
+from history import SessionHistory, UIEvent
+from llm_fallback import LLMFallback, normalize_utterance
+from metrics import (
+    CART_ITEMS,
+    INTENT_LATENCY,
+    STATE_BYTES,
+    UNMATCHED_UTTERANCES,
+    MetricsMiddleware,
+    registry,
+)
+from recommendations import CooccurrenceIndex
+from state_cache import SerializedStateCache
+from static_assets import AssetCache, etag_matches
 from ui_state import UIState, CartItem, FilterState
 
-app = FastAPI(title="Task 6 – State-Aware UI Agent (Web)")
+
+# ----------------------
+# Static assets
+# ----------------------
+
+# Set UI_DEV_RELOAD=1 to pick up edits to index.html without restarting.
+DEV_RELOAD = os.getenv("UI_DEV_RELOAD", "0") == "1"
+
+# index.html is the app shell, so browsers always revalidate it; the ETag
+# makes that revalidation a cheap 304.
+INDEX_CACHE_CONTROL = "no-cache"
+
+assets = AssetCache(Path(__file__).parent, ["index.html"])
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    watcher = asyncio.create_task(assets.watch()) if DEV_RELOAD else None
+    try:
+        yield
+    finally:
+        if watcher is not None:
+            watcher.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await watcher
+
+
+app = FastAPI(title="Task 6 – State-Aware UI Agent (Web)", lifespan=lifespan)
+app.add_middleware(MetricsMiddleware)
 
 
 # ----------------------
@@ -24,43 +70,302 @@ CATALOG = {
     "p4": CartItem(product_id="p4", name="Dell Laptop", price=55000.0),
 }
 
+# Keywords that identify each catalog product in free text, checked in order.
+PRODUCT_KEYWORDS = [
+    ("p1", ("iphone",)),
+    ("p2", ("samsung", "galaxy")),
+    ("p3", ("airpods", "earbuds")),
+    ("p4", ("laptop", "dell")),
+]
+
+CATEGORIES = ("electronics", "mobiles")
+
+# Intents that only read the state; they are not recorded in the history.
+READ_ONLY_INTENTS = {"introspect", "help"}
+
+# Commands handled by the agent itself, before any intent resolution.
+SPECIAL_COMMANDS = {"undo", "redo"}
+
+
+def match_product_id(text: str) -> Optional[str]:
+    """Return the catalog id of the first product mentioned in `text`."""
+    for product_id, keywords in PRODUCT_KEYWORDS:
+        if any(keyword in text for keyword in keywords):
+            return product_id
+    return None
+
+
+# Separators between commands in a compound utterance such as
+# "add iphone, add laptop and checkout".
+COMMAND_SEPARATOR = re.compile(r"\s*(?:[,;]|\band then\b|\bthen\b|\band\b)\s*")
+
+# Verbs that carry over to a following bare product: "add iphone and laptop".
+CARRY_OVER_VERBS = ("add", "remove")
+
+
+def split_commands(text: str) -> List[str]:
+    """
+    Split a normalized utterance into individual commands.
+
+    A fragment that is just a product name inherits the add/remove verb
+    of the command before it.
+    """
+    commands: List[str] = []
+    verb: Optional[str] = None
+    for fragment in COMMAND_SEPARATOR.split(text):
+        if not fragment:
+            continue
+        first_word = fragment.split(" ", 1)[0]
+        if first_word in CARRY_OVER_VERBS:
+            verb = first_word
+        elif verb is not None and match_product_id(fragment) is not None:
+            fragment = f"{verb} {fragment}"
+        else:
+            verb = None
+        commands.append(fragment)
+    return commands
+
+
+def resolve_intent(text: str) -> UIEvent:
+    """Map a normalized (stripped, lower-cased) message to an event."""
+    if any(word in text for word in ["show", "browse", "see"]) and "cart" in text:
+        return UIEvent("view_cart")
+    elif text.startswith("add "):
+        return UIEvent("add", match_product_id(text))
+    elif text.startswith("remove "):
+        return UIEvent("remove", match_product_id(text))
+    elif "electronics" in text:
+        return UIEvent("set_category", "electronics")
+    elif "mobiles" in text or "phones" in text:
+        return UIEvent("set_category", "mobiles")
+    elif "clear filters" in text:
+        return UIEvent("clear_filters")
+    elif "checkout" in text:
+        return UIEvent("checkout")
+    elif "state" in text and "show" in text:
+        return UIEvent("introspect")
+    return UIEvent("help")
+
 
 class UIAgent:
     """
     Simple state-aware e-commerce assistant for the web UI.
 
     - Maintains a UIState object.
-    - Parses user commands.
-    - Updates the state.
+    - Parses user commands into compact UIEvents.
+    - Updates the state and records each effective change in a SessionHistory.
     - Returns reply + updated state.
+
+    `version` is bumped on every handled message so readers (like the
+    /state cache) can tell when the state may have changed.
     """
 
-    def __init__(self, initial_state: Optional[UIState] = None) -> None:
+    def __init__(
+        self,
+        initial_state: Optional[UIState] = None,
+        snapshot_every: int = 50,
+        max_snapshots: Optional[int] = 20,
+        fallback: Optional[LLMFallback] = None,
+        recommender: Optional[CooccurrenceIndex] = None,
+    ) -> None:
         self.state: UIState = initial_state or UIState()
+        self.version: int = 0
+        self.history = SessionHistory(
+            self.state, snapshot_every=snapshot_every, max_snapshots=max_snapshots
+        )
+        self.fallback = fallback
+        self.recommender = recommender
+        # Products whose pairs this session already fed to the recommender.
+        self._counted_items: Set[str] = set()
+
+    @classmethod
+    def from_history(
+        cls,
+        history: SessionHistory,
+        fallback: Optional[LLMFallback] = None,
+        recommender: Optional[CooccurrenceIndex] = None,
+    ) -> "UIAgent":
+        """Rebuild an agent at `history.cursor` from snapshot + replay."""
+        agent = cls(
+            snapshot_every=history.snapshot_every,
+            max_snapshots=history.max_snapshots,
+            fallback=fallback,
+            recommender=recommender,
+        )
+        agent.history = history
+        agent.restore(history.cursor)
+        return agent
+
+    async def warm_fallback(self, messages: List[str]) -> None:
+        """
+        Resolve commands the rules miss through the LLM fallback ahead of
+        handling, so the synchronous path below only does cache lookups.
+        """
+        if self.fallback is None:
+            return
+        for message in messages:
+            for command in split_commands(message.strip().lower()):
+                if (
+                    command in SPECIAL_COMMANDS
+                    or resolve_intent(command).intent != "help"
+                    or self.fallback.knows(command)
+                ):
+                    continue
+                await self.fallback.resolve(command, self.state)
 
     def handle_user_message(self, message: str) -> Tuple[str, UIState]:
-        text = message.strip().lower()
-
-        if any(word in text for word in ["show", "browse", "see"]) and "cart" in text:
-            reply = self._go_to_cart()
-        elif text.startswith("add "):
-            reply = self._add_item_from_text(text)
-        elif text.startswith("remove "):
-            reply = self._remove_item_from_text(text)
-        elif "electronics" in text:
-            reply = self._set_category("electronics")
-        elif "mobiles" in text or "phones" in text:
-            reply = self._set_category("mobiles")
-        elif "clear filters" in text:
-            reply = self._clear_filters()
-        elif "checkout" in text:
-            reply = self._go_to_checkout()
-        elif "state" in text and "show" in text:
-            reply = self._introspect_state()
-        else:
-            reply = self._generic_help()
-
-        return reply, self.state
+        """Handle one message, which may hold several commands."""
+        return self.handle_batch([message])
+
+    def handle_batch(self, messages: List[str]) -> Tuple[str, UIState]:
+        """
+        Apply every command in `messages` (each possibly compound) in order.
+
+        The state is committed once for the whole batch – a single
+        version bump and a single undo step – and the replies are joined
+        into one. An "undo" or "redo" inside the batch first closes the
+        step so far, so it acts on the commands before it.
+        """
+        replies: List[str] = []
+        pending: List[Tuple[UIEvent, str]] = []
+        for message in messages:
+            commands = [
+                (command, self._resolve_command(command))
+                for command in split_commands(message.strip().lower())
+            ]
+            # Bare filler such as the "please" in "show cart, please" is dropped.
+            commands = [
+                (command, event)
+                for command, event in commands
+                if event.intent != "help" or normalize_utterance(command)
+            ]
+            # Unknown commands next to understood ones get a short note;
+            # if nothing was understood, the full help is shown once.
+            understood = any(event.intent != "help" for _, event in commands)
+            for command, event in commands:
+                if event.intent in SPECIAL_COMMANDS:
+                    self._record_step(pending)
+                    replies.append(self._handle_command(event, pending))
+                    continue
+                if event.intent != "help":
+                    replies.append(self._handle_command(event, pending))
+                    continue
+                UNMATCHED_UTTERANCES.inc("help")
+                if understood:
+                    replies.append(f"Sorry, I didn't understand '{command}'.")
+            if commands and not understood:
+                replies.append(self._handle_command(UIEvent("help"), pending))
+        self._record_step(pending)
+
+        if not replies:
+            replies.append(self.apply(UIEvent("help")))
+            UNMATCHED_UTTERANCES.inc("help")
+
+        CART_ITEMS.observe(self.state.total_items())
+        self.version += 1
+        return "\n\n".join(replies), self.state
+
+    def _resolve_command(self, text: str) -> UIEvent:
+        """Rules first, then anything the LLM fallback has learned."""
+        if text in SPECIAL_COMMANDS:
+            return UIEvent(text)
+        event = resolve_intent(text)
+        if event.intent == "help" and self.fallback is not None:
+            _, learned = self.fallback.lookup(text)
+            event = learned or event
+        return event
+
+    def _handle_command(self, event: UIEvent, pending: List[Tuple[UIEvent, str]]) -> str:
+        """
+        Apply one command. If it changed the state, append it to `pending`
+        together with the state JSON from before it.
+        """
+        if event.intent == "undo":
+            return "Undid your last change." if self.undo() else "Nothing to undo."
+        elif event.intent == "redo":
+            return "Redid your last change." if self.redo() else "Nothing to redo."
+
+        mutating = event.intent not in READ_ONLY_INTENTS
+        # A JSON fingerprint is several times cheaper than a deep copy.
+        before = self.state.model_dump_json() if mutating else None
+
+        start = time.perf_counter()
+        reply = self.apply(event)
+        INTENT_LATENCY.observe(time.perf_counter() - start, event.intent)
+
+        if event.intent in ("add", "remove") and event.arg is None:
+            UNMATCHED_UTTERANCES.inc("product")
+        # Only commands that actually changed something become part of the
+        # undo step; "add headphones" or "remove tv" leave nothing to undo.
+        if mutating and self.state.model_dump_json() != before:
+            pending.append((event, before))
+        if self.recommender and event.intent == "checkout" and self.state.current_view == "checkout":
+            # Learn from live checkouts only (replays go through apply()),
+            # and only pairs this session hasn't counted yet, so checking
+            # out the same cart again doesn't skew the index.
+            cart = {item.product_id for item in self.state.cart}
+            self.recommender.add_cart(cart, seen=self._counted_items)
+            self._counted_items |= cart
+        return reply
+
+    def _record_step(self, pending: List[Tuple[UIEvent, str]]) -> None:
+        """
+        Record `pending` as one history step and clear it. Several commands
+        that cancel out, like "add iphone, remove iphone", record nothing.
+        """
+        if len(pending) == 1:
+            self.history.record(pending[0][0], self.state)
+        elif pending and self.state.model_dump_json() != pending[0][1]:
+            steps = tuple(event for event, _ in pending)
+            self.history.record(UIEvent("batch", steps=steps), self.state)
+        pending.clear()
+
+    def apply(self, event: UIEvent) -> str:
+        """Apply a single event to the current state and return the reply."""
+        if event.steps:
+            return "\n\n".join(self.apply(step) for step in event.steps)
+        intent, arg = event.intent, event.arg
+        if intent == "view_cart":
+            return self._go_to_cart()
+        elif intent == "add":
+            return self._add_item(arg)
+        elif intent == "remove":
+            return self._remove_item(arg)
+        elif intent == "set_category":
+            return self._set_category(arg or "")
+        elif intent == "clear_filters":
+            return self._clear_filters()
+        elif intent == "checkout":
+            return self._go_to_checkout()
+        elif intent == "introspect":
+            return self._introspect_state()
+        return self._generic_help()
+
+    # --- History ---
+
+    def restore(self, seq: int) -> None:
+        """Move the state to just after event `seq` (0 = session start)."""
+        base, state = self.history.nearest_snapshot(seq)
+        self.state = state
+        for event in self.history.events[base:seq]:
+            self.apply(event)
+        self.history.cursor = seq
+        self.version += 1
+
+    def undo(self) -> bool:
+        if not self.history.can_undo:
+            return False
+        self.restore(self.history.cursor - 1)
+        return True
+
+    def redo(self) -> bool:
+        if not self.history.can_redo:
+            return False
+        # Redo is a single forward step, no need to go through a snapshot.
+        self.apply(self.history.events[self.history.cursor])
+        self.history.cursor += 1
+        self.version += 1
+        return True
 
     # --- Internal helpers ---
 
@@ -75,22 +380,19 @@ class UIAgent:
                 f"- {item.name} (x{item.quantity}) — ₹{item.price * item.quantity:.2f}"
             )
         lines.append(f"Total: ₹{self.state.total_price():.2f}")
+        if self.recommender is not None:
+            suggested = self.recommender.recommend_for_cart([i.product_id for i in self.state.cart])
+            if suggested:
+                lines.append(f"You might also like: {self._product_names(suggested)}")
         return "\n".join(lines)
 
-    def _add_item_from_text(self, text: str) -> str:
-        if "iphone" in text:
-            product = CATALOG["p1"]
-        elif "samsung" in text or "galaxy" in text:
-            product = CATALOG["p2"]
-        elif "airpods" in text or "earbuds" in text:
-            product = CATALOG["p3"]
-        elif "laptop" in text or "dell" in text:
-            product = CATALOG["p4"]
-        else:
+    def _add_item(self, product_id: Optional[str]) -> str:
+        if product_id is None:
             return (
                 "I couldn't match that product. Try: "
                 "add iphone / add samsung / add airpods / add laptop."
             )
+        product = CATALOG[product_id]
 
         for item in self.state.cart:
             if item.product_id == product.product_id:
@@ -100,6 +402,7 @@ class UIAgent:
                     f"Added one more {product.name} to your cart. "
                     f"Now you have {item.quantity} of them. "
                     f"Cart total is ₹{self.state.total_price():.2f}."
+                    + self._bought_together(product_id)
                 )
 
         self.state.cart.append(CartItem(**product.model_dump()))
@@ -108,22 +411,26 @@ class UIAgent:
             f"Added {product.name} to your cart. "
             f"You now have {self.state.total_items()} item(s) in the cart. "
             f"Cart total is ₹{self.state.total_price():.2f}."
+            + self._bought_together(product_id)
         )
 
-    def _remove_item_from_text(self, text: str) -> str:
+    def _bought_together(self, product_id: str) -> str:
+        if self.recommender is None:
+            return ""
+        in_cart = [item.product_id for item in self.state.cart]
+        suggested = self.recommender.recommend(product_id, exclude=in_cart)
+        if not suggested:
+            return ""
+        return f"\nFrequently bought together: {self._product_names(suggested)}."
+
+    @staticmethod
+    def _product_names(product_ids: List[str]) -> str:
+        return ", ".join(CATALOG[pid].name for pid in product_ids if pid in CATALOG)
+
+    def _remove_item(self, target_id: Optional[str]) -> str:
         if not self.state.cart:
             return "Cart is already empty. Nothing to remove."
 
-        target_id = None
-        if "iphone" in text:
-            target_id = "p1"
-        elif "samsung" in text or "galaxy" in text:
-            target_id = "p2"
-        elif "airpods" in text or "earbuds" in text:
-            target_id = "p3"
-        elif "laptop" in text or "dell" in text:
-            target_id = "p4"
-
         if target_id is None:
             return (
                 "I couldn't figure out which item to remove. "
@@ -188,12 +495,41 @@ class UIAgent:
             "- 'show cart'\n"
             "- 'remove laptop'\n"
             "- 'checkout'\n"
+            "- 'undo' / 'redo'\n"
             "- 'show state' (to see internal UI state)"
         )
 
 
+def build_fallback() -> Optional[LLMFallback]:
+    """
+    Optional pydantic-ai fallback for unmatched commands.
+
+    Enabled with UI_LLM_FALLBACK=1; the model comes from UI_LLM_MODEL.
+    """
+    if os.getenv("UI_LLM_FALLBACK", "0") != "1":
+        return None
+    return LLMFallback(
+        os.getenv("UI_LLM_MODEL", "google-gla:gemini-2.5-flash"),
+        catalog={pid: item.name for pid, item in CATALOG.items()},
+        categories=CATEGORIES,
+    )
+
+
+def build_recommender() -> CooccurrenceIndex:
+    """
+    Load the frequently-bought-together index built offline by
+    `python recommendations.py <carts.jsonl>`. UI_RECS_PATH overrides the
+    default location; without a file we start empty and learn from checkouts.
+    """
+    path = os.getenv("UI_RECS_PATH", str(Path(__file__).parent / "recommendations.json"))
+    if os.path.exists(path):
+        return CooccurrenceIndex.load(path)
+    return CooccurrenceIndex()
+
+
 # Single global agent for this simple demo.
-agent = UIAgent()
+agent = UIAgent(fallback=build_fallback(), recommender=build_recommender())
+state_cache = SerializedStateCache()
 
 
 # ----------------------
@@ -202,11 +538,27 @@ agent = UIAgent()
 
 
 @app.get("/", response_class=HTMLResponse)
-async def index(request: Request) -> HTMLResponse:
-    """Serve the main HTML page."""
-    html_path = Path(__file__).parent / "index.html"
-    html = html_path.read_text(encoding="utf-8")
-    return HTMLResponse(html)
+async def index(request: Request) -> Response:
+    """
+    Serve the main HTML page from the in-memory asset cache.
+
+    Picks a precompressed variant based on Accept-Encoding and answers
+    conditional GETs with 304 when the ETag still matches.
+    """
+    asset = assets.get("index.html")
+    coding, body, etag = asset.select(request.headers.get("accept-encoding"))
+    headers = {
+        "ETag": etag,
+        "Cache-Control": INDEX_CACHE_CONTROL,
+        "Vary": "Accept-Encoding",
+    }
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    if coding != "identity":
+        headers["Content-Encoding"] = coding
+    return Response(content=body, media_type=asset.media_type, headers=headers)
 
 
 @app.post("/message", response_class=HTMLResponse)
@@ -217,6 +569,7 @@ async def handle_message(message: str = Form(...)) -> HTMLResponse:
     Returns an HTML snippet that HTMX will append to the chat area.
     Also triggers a state refresh via embedded script.
     """
+    await agent.warm_fallback([message])
     reply, state = agent.handle_user_message(message)
 
     # Simple HTML snippet containing user + agent messages.
@@ -233,15 +586,64 @@ async def handle_message(message: str = Form(...)) -> HTMLResponse:
     return HTMLResponse(snippet)
 
 
+class BatchRequest(BaseModel):
+    """Body of POST /batch: a list of commands and/or one compound message."""
+
+    commands: List[str] = Field(default_factory=list)
+    message: Optional[str] = None
+
+
+class BatchResponse(BaseModel):
+    reply: str
+    version: int
+    state: UIState
+
+
+@app.post("/batch", response_model=BatchResponse)
+async def handle_batch(request: BatchRequest) -> BatchResponse:
+    """
+    Apply several commands in one round-trip.
+
+    Commands run in order against the shared agent with a single state
+    commit, and the combined reply is returned with the new state.
+    """
+    messages = list(request.commands)
+    if request.message:
+        messages.append(request.message)
+    await agent.warm_fallback(messages)
+    reply, state = agent.handle_batch(messages)
+    return BatchResponse(reply=reply, version=agent.version, state=state)
+
+
 @app.get("/state", response_class=HTMLResponse)
-async def get_state() -> HTMLResponse:
+async def get_state(request: Request, compact: bool = False) -> Response:
     """
-    Returns the current UI state as pretty-printed JSON inside <pre>.
+    Returns the current UI state as JSON inside <pre>.
     HTMX swaps this into the state panel.
+
+    The rendered body is cached per state version; pass `?compact=true`
+    to skip pretty-printing. Clients that send a matching If-None-Match
+    get an empty 304.
     """
-    state_json = json.dumps(agent.state.model_dump(), indent=2)
-    html = f"<pre>{state_json}</pre>"
-    return HTMLResponse(html)
+    body, etag = state_cache.render(agent.state, agent.version, compact=compact)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    STATE_BYTES.observe(len(body))
+    return Response(content=body, media_type="text/html; charset=utf-8", headers=headers)
+
+
+@app.get("/fallback/rules")
+async def fallback_rules() -> List[dict]:
+    """Phrasings the LLM fallback has promoted to exact-match rules."""
+    return agent.fallback.export_rules() if agent.fallback is not None else []
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> PlainTextResponse:
+    """Prometheus text exposition of the in-process metrics."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
 
 
 @app.get("/health", response_class=PlainTextResponse)
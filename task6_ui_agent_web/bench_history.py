@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import time
+from typing import List
+
+from backend import UIAgent
+
+COMMANDS = [
+    "add iphone",
+    "add samsung",
+    "add airpods",
+    "add laptop",
+    "remove iphone",
+    "remove laptop",
+    "show electronics",
+    "show mobiles",
+    "clear filters",
+    "show cart",
+    "checkout",
+]
+
+
+def build_session(length: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    return [rng.choice(COMMANDS) for _ in range(length)]
+
+
+def run(length: int, snapshot_every: int, restores: int, seed: int) -> dict:
+    session = build_session(length, seed)
+
+    # Unbounded history so the full replay below starts from the same base.
+    agent = UIAgent(snapshot_every=snapshot_every, max_snapshots=None)
+    start = time.perf_counter()
+    for message in session:
+        agent.handle_user_message(message)
+    record_s = time.perf_counter() - start
+    final = agent.state.model_dump()
+
+    # Restore the final state from the log alone, two ways.
+    start = time.perf_counter()
+    restored = UIAgent.from_history(agent.history)
+    snapshot_restore_s = time.perf_counter() - start
+    assert restored.state.model_dump() == final
+
+    start = time.perf_counter()
+    replayed = UIAgent()
+    for event in agent.history.events:
+        replayed.apply(event)
+    full_replay_s = time.perf_counter() - start
+    assert replayed.state.model_dump() == final
+
+    # Random-access restores, e.g. jumping around in an undo stack.
+    rng = random.Random(seed + 1)
+    start = time.perf_counter()
+    for _ in range(restores):
+        restored.restore(rng.randint(0, len(agent.history.events)))
+    random_restore_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    undo_count = min(restores, len(agent.history.events))
+    for _ in range(undo_count):
+        agent.undo()
+    undo_s = time.perf_counter() - start
+
+    return {
+        "events": len(agent.history.events),
+        "snapshot_every": snapshot_every,
+        "record_us_per_msg": record_s / length * 1e6,
+        "snapshot_restore_ms": snapshot_restore_s * 1e3,
+        "full_replay_ms": full_replay_s * 1e3,
+        "random_restore_us": random_restore_s / max(restores, 1) * 1e6,
+        "undo_us": undo_s / max(undo_count, 1) * 1e6,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark UIAgent event-log replay")
+    parser.add_argument("--length", type=int, default=100_000, help="Commands per session")
+    parser.add_argument("--snapshot-every", type=int, default=50)
+    parser.add_argument("--restores", type=int, default=1_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    result = run(args.length, args.snapshot_every, args.restores, args.seed)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import bisect
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from ui_state import UIState
+
+
+class UIEvent(NamedTuple):
+    """
+    One handled command in compact form.
+
+    `intent` is the resolved action (e.g. "add", "set_category") and `arg`
+    its single argument (a product id, a category), if any. A compound
+    message or batch is one "batch" event whose `steps` are its commands,
+    so it is undone and redone as a unit. Replaying the same events
+    through a UIAgent reproduces the same state.
+    """
+
+    intent: str
+    arg: Optional[str] = None
+    steps: Tuple["UIEvent", ...] = ()
+
+
+class SessionHistory:
+    """
+    Append-only event log with periodic state snapshots.
+
+    - `events[i]` is the i-th state-changing step of the session: one
+      command, or one batch of them.
+    - `cursor` is how many events are currently applied; undo moves it
+      back, redo forward. Recording a new event drops the redo tail.
+    - A deep copy of the state is kept every `snapshot_every` events, so
+      restoring any point is one snapshot copy plus at most
+      `snapshot_every - 1` replayed events.
+    - At most `max_snapshots` snapshots are kept (None = unbounded). Past
+      that, the oldest snapshot and the events before the next one are
+      folded away: the next snapshot becomes the new base (seq 0), so
+      memory stays bounded and undo reaches back about
+      `max_snapshots * snapshot_every` events.
+    """
+
+    def __init__(
+        self,
+        initial_state: UIState,
+        snapshot_every: int = 50,
+        max_snapshots: Optional[int] = 20,
+    ) -> None:
+        if snapshot_every < 1:
+            raise ValueError("snapshot_every must be >= 1")
+        if max_snapshots is not None and max_snapshots < 2:
+            raise ValueError("max_snapshots must be >= 2")
+        self.snapshot_every = snapshot_every
+        self.max_snapshots = max_snapshots
+        self.events: List[UIEvent] = []
+        self.cursor: int = 0
+        self._snapshots: Dict[int, UIState] = {0: initial_state.model_copy(deep=True)}
+        self._snapshot_seqs: List[int] = [0]
+
+    def record(self, event: UIEvent, state_after: UIState) -> None:
+        """Append `event`, whose application produced `state_after`."""
+        if self.cursor < len(self.events):
+            self._truncate(self.cursor)
+
+        self.events.append(event)
+        self.cursor += 1
+        if self.cursor % self.snapshot_every == 0:
+            self._snapshots[self.cursor] = state_after.model_copy(deep=True)
+            self._snapshot_seqs.append(self.cursor)
+            if self.max_snapshots is not None and len(self._snapshot_seqs) > self.max_snapshots:
+                self._compact()
+
+    def nearest_snapshot(self, seq: int) -> Tuple[int, UIState]:
+        """
+        Return (snapshot_seq, state copy) for the latest snapshot at or
+        before `seq`. The copy is safe to mutate.
+        """
+        if not 0 <= seq <= len(self.events):
+            raise IndexError(f"seq {seq} outside history of {len(self.events)} events")
+        idx = bisect.bisect_right(self._snapshot_seqs, seq) - 1
+        base = self._snapshot_seqs[idx]
+        return base, self._snapshots[base].model_copy(deep=True)
+
+    @property
+    def can_undo(self) -> bool:
+        return self.cursor > 0
+
+    @property
+    def can_redo(self) -> bool:
+        return self.cursor < len(self.events)
+
+    def _compact(self) -> None:
+        """Drop the oldest snapshot and rebase everything on the next one."""
+        base = self._snapshot_seqs[1]
+        del self.events[:base]
+        self.cursor -= base
+        self._snapshots = {
+            seq - base: state for seq, state in self._snapshots.items() if seq >= base
+        }
+        self._snapshot_seqs = [seq - base for seq in self._snapshot_seqs[1:]]
+
+    def _truncate(self, seq: int) -> None:
+        del self.events[seq:]
+        idx = bisect.bisect_right(self._snapshot_seqs, seq)
+        for dropped in self._snapshot_seqs[idx:]:
+            del self._snapshots[dropped]
+        del self._snapshot_seqs[idx:]
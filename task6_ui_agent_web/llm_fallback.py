@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import re
+from collections import OrderedDict
+from typing import Any, Dict, List, Literal, Optional, Sequence, Tuple
+
+from pydantic import BaseModel, Field
+
+from history import UIEvent
+from metrics import registry
+from ui_state import UIState
+
+try:  # pydantic-ai is only needed when the fallback is enabled.
+    from pydantic_ai import Agent
+except ImportError:  # pragma: no cover - depends on the environment
+    Agent = None
+
+LLM_FALLBACK = registry.counter(
+    "ui_llm_fallback_total",
+    "Unmatched commands handled by the LLM fallback, by result.",
+    label="result",
+)
+
+# Filler words dropped when normalizing, so "please add an iphone" and
+# "add iphone" share one cache entry.
+FILLER_WORDS = {
+    "a", "an", "the", "please", "pls", "can", "could", "you", "i", "want", "to",
+    "would", "like", "me", "my", "some", "just", "hey", "hi", "id", "im",
+    "thanks", "thank", "ok", "okay",
+}
+_NON_WORD = re.compile(r"[^a-z0-9 ]+")
+
+
+def normalize_utterance(text: str) -> str:
+    """Lower-case, strip punctuation and filler words, collapse whitespace."""
+    words = _NON_WORD.sub(" ", text.lower().replace("'", "")).split()
+    return " ".join(w for w in words if w not in FILLER_WORDS)
+
+
+class UIAction(BaseModel):
+    """Structured action the LLM maps a free-form utterance to."""
+
+    action: Literal["add", "remove", "set_category", "clear_filters", "checkout", "view_cart", "none"] = Field(
+        description="UI action to take, or 'none' if the message is not a shopping command"
+    )
+    product_id: Optional[str] = Field(
+        default=None, description="Catalog product id for add/remove, e.g. 'p1'"
+    )
+    category: Optional[str] = Field(
+        default=None, description="Category for set_category, e.g. 'electronics'"
+    )
+
+
+class UtteranceCache:
+    """
+    LRU map of normalized utterance -> resolved event (None = not a command).
+
+    Each entry counts its hits so frequent phrasings can be promoted.
+    """
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, Tuple[Optional[UIEvent], int]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def get(self, key: str) -> Tuple[bool, Optional[UIEvent], int]:
+        """Return (found, event, hits) and mark the entry as recently used."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None, 0
+        event, hits = entry
+        hits += 1
+        self._entries[key] = (event, hits)
+        self._entries.move_to_end(key)
+        return True, event, hits
+
+    def put(self, key: str, event: Optional[UIEvent]) -> None:
+        self._entries[key] = (event, 0)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def pop(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+
+class LLMFallback:
+    """
+    Maps utterances the keyword rules miss to UI actions with pydantic-ai.
+
+    - `lookup` is synchronous and never calls the model: it checks the
+      promoted phrase rules, then the LRU cache.
+    - `resolve` is the async slow path: one model call, result cached.
+    - A cached phrasing hit `promote_after` times is promoted to `rules`,
+      which are never evicted and can be exported next to the keyword rules.
+
+    `model` is anything pydantic-ai accepts, e.g. a model name or a local
+    `FunctionModel` / `TestModel` stub.
+    """
+
+    def __init__(
+        self,
+        model: Any,
+        catalog: Dict[str, str],
+        categories: Sequence[str],
+        cache_size: int = 1024,
+        promote_after: int = 3,
+    ) -> None:
+        if Agent is None:
+            raise RuntimeError("pydantic-ai is required for the LLM fallback")
+        self.catalog = catalog
+        self.categories = list(categories)
+        self.promote_after = promote_after
+        self.cache = UtteranceCache(cache_size)
+        self.rules: Dict[str, UIEvent] = {}
+        self._agent = Agent(model, output_type=UIAction, instructions=self._instructions())
+
+    def _instructions(self) -> str:
+        products = "\n".join(f"- {pid}: {name}" for pid, name in self.catalog.items())
+        return (
+            "You translate shopping-assistant messages into a single UI action.\n"
+            f"Products:\n{products}\n"
+            f"Categories: {', '.join(self.categories)}\n"
+            "Use only the product ids and categories listed above. "
+            "If the message is not a shopping command, answer with action 'none'."
+        )
+
+    def knows(self, text: str) -> bool:
+        """True if `text` resolves without a model call."""
+        key = normalize_utterance(text)
+        return key in self.rules or key in self.cache
+
+    def lookup(self, text: str) -> Tuple[bool, Optional[UIEvent]]:
+        """Return (known, event) without calling the model."""
+        key = normalize_utterance(text)
+        rule = self.rules.get(key)
+        if rule is not None:
+            LLM_FALLBACK.inc("rule")
+            return True, rule
+
+        found, event, hits = self.cache.get(key)
+        if not found:
+            return False, None
+        LLM_FALLBACK.inc("cache_hit")
+        if event is not None and hits >= self.promote_after:
+            self.rules[key] = event
+            self.cache.pop(key)
+        return True, event
+
+    async def resolve(self, text: str, state: UIState) -> Optional[UIEvent]:
+        """
+        Ask the model, cache and return the event (None if not a command).
+
+        Callers should check `knows` first; this always calls the model.
+        """
+        key = normalize_utterance(text)
+        if not key:
+            # Nothing but filler, e.g. the "please" in "show cart, please".
+            return None
+        prompt = (
+            f"Current UI state: {state.model_dump_json()}\n"
+            f"User message: {text}"
+        )
+        try:
+            result = await self._agent.run(prompt)
+        except Exception:
+            # Don't cache failures; the next attempt may succeed.
+            LLM_FALLBACK.inc("error")
+            return None
+
+        event = self._to_event(result.output)
+        self.cache.put(key, event)
+        LLM_FALLBACK.inc("model" if event is not None else "model_none")
+        return event
+
+    def export_rules(self) -> List[Dict[str, Optional[str]]]:
+        """Promoted phrasings, ready to be reviewed and added to the rules."""
+        return [
+            {"utterance": key, "intent": event.intent, "arg": event.arg}
+            for key, event in sorted(self.rules.items())
+        ]
+
+    def _to_event(self, action: UIAction) -> Optional[UIEvent]:
+        if action.action in ("add", "remove"):
+            if action.product_id not in self.catalog:
+                return None
+            return UIEvent(action.action, action.product_id)
+        if action.action == "set_category":
+            if action.category not in self.categories:
+                return None
+            return UIEvent("set_category", action.category)
+        if action.action == "none":
+            return None
+        return UIEvent(action.action)
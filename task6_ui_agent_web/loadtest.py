@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import json
+import math
+import time
+from collections import defaultdict
+from typing import AsyncIterator, Awaitable, Dict, List, Optional
+
+import httpx
+
+# Default multi-turn sessions, replayed round-robin. Each message is
+# followed by a /state poll, the same way the HTMX page behaves.
+DEFAULT_SCRIPTS: List[List[str]] = [
+    ["show electronics", "add iphone", "add laptop", "show cart", "checkout"],
+    ["add samsung", "add airpods", "remove samsung", "show state"],
+    ["show mobiles", "add iphone", "add iphone", "undo", "clear filters", "show cart"],
+    ["hello", "add something", "remove laptop", "checkout"],
+]
+
+
+class RouteStats:
+    """Latencies and error count for one route."""
+
+    def __init__(self) -> None:
+        self.latencies: List[float] = []
+        self.errors = 0
+
+    def record(self, elapsed: float, ok: bool) -> None:
+        self.latencies.append(elapsed)
+        if not ok:
+            self.errors += 1
+
+    def summary(self, wall_s: float) -> dict:
+        count = len(self.latencies)
+        ordered = sorted(self.latencies)
+        return {
+            "requests": count,
+            "rps": count / wall_s if wall_s else 0.0,
+            "p50_ms": _percentile(ordered, 50) * 1e3,
+            "p99_ms": _percentile(ordered, 99) * 1e3,
+            "max_ms": (ordered[-1] if ordered else 0.0) * 1e3,
+            "errors": self.errors,
+            "error_rate": self.errors / count if count else 0.0,
+        }
+
+
+def _percentile(ordered: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+@contextlib.asynccontextmanager
+async def open_client(url: Optional[str]) -> AsyncIterator[httpx.AsyncClient]:
+    """
+    Client against a running server if `url` is given, otherwise against
+    the backend app in-process through an ASGI transport (no network).
+    """
+    if url:
+        async with httpx.AsyncClient(base_url=url) as client:
+            yield client
+        return
+
+    from backend import app
+
+    async with app.router.lifespan_context(app):
+        # Unhandled app errors come back as 500s and count as failures
+        # instead of aborting the whole run.
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest") as client:
+            yield client
+
+
+async def _timed(
+    stats: Dict[str, RouteStats],
+    route: str,
+    request: Awaitable[httpx.Response],
+) -> None:
+    start = time.perf_counter()
+    try:
+        response = await request
+        ok = response.status_code < 400
+    except Exception:
+        # Transport errors, timeouts, or anything the app raised: one failed
+        # request, not a crashed load test.
+        ok = False
+    stats[route].record(time.perf_counter() - start, ok)
+
+
+async def run_session(
+    client: httpx.AsyncClient,
+    script: List[str],
+    stats: Dict[str, RouteStats],
+) -> None:
+    await _timed(stats, "GET /", client.get("/", headers={"accept-encoding": "gzip, br"}))
+    await _timed(stats, "GET /state", client.get("/state"))
+    for message in script:
+        await _timed(stats, "POST /message", client.post("/message", data={"message": message}))
+        await _timed(stats, "GET /state", client.get("/state"))
+
+
+async def run_load(
+    sessions: int,
+    concurrency: int,
+    url: Optional[str] = None,
+    scripts: Optional[List[List[str]]] = None,
+) -> dict:
+    """Replay `sessions` scripted sessions with at most `concurrency` in flight."""
+    scripts = scripts or DEFAULT_SCRIPTS
+    stats: Dict[str, RouteStats] = defaultdict(RouteStats)
+    queue: "asyncio.Queue[List[str]]" = asyncio.Queue()
+    for i in range(sessions):
+        queue.put_nowait(scripts[i % len(scripts)])
+
+    async with open_client(url) as client:
+
+        async def worker() -> None:
+            while True:
+                try:
+                    script = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                await run_session(client, script, stats)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        wall_s = time.perf_counter() - start
+
+    overall = RouteStats()
+    for route_stats in stats.values():
+        overall.latencies.extend(route_stats.latencies)
+        overall.errors += route_stats.errors
+
+    return {
+        "target": url or "asgi",
+        "sessions": sessions,
+        "concurrency": concurrency,
+        "wall_s": wall_s,
+        "overall": overall.summary(wall_s),
+        "routes": {route: s.summary(wall_s) for route, s in sorted(stats.items())},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test the Task 6 web backend")
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument(
+        "--url",
+        type=str,
+        default=None,
+        help="Base URL of a running server (e.g. http://127.0.0.1:8000); in-process if omitted",
+    )
+    parser.add_argument(
+        "--scripts",
+        type=str,
+        default=None,
+        help="JSON file containing a list of sessions, each a list of messages",
+    )
+    parser.add_argument("--output", type=str, default=None, help="Write the JSON report here")
+    args = parser.parse_args()
+
+    scripts = None
+    if args.scripts:
+        with open(args.scripts, encoding="utf-8") as f:
+            scripts = json.load(f)
+
+    report = asyncio.run(run_load(args.sessions, args.concurrency, args.url, scripts))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import bisect
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+# Default latency buckets in seconds: 50µs .. 1s.
+LATENCY_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+)
+
+
+def _format_labels(label_name: Optional[str], label_value: str, extra: str = "") -> str:
+    parts = []
+    if label_name is not None:
+        parts.append(f'{label_name}="{label_value}"')
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with at most one label."""
+
+    def __init__(self, name: str, help_text: str, label: Optional[str] = None) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self._values: Dict[str, float] = {}
+
+    def inc(self, label_value: str = "", amount: float = 1) -> None:
+        self._values[label_value] = self._values.get(label_value, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for label_value, value in sorted(self._values.items()):
+            labels = _format_labels(self.label, label_value)
+            lines.append(f"{self.name}{labels} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram with at most one label.
+
+    `observe` is a bisect plus two list/float updates; cumulative bucket
+    counts are only computed when /metrics is scraped.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+        label: Optional[str] = None,
+    ) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.buckets: Tuple[float, ...] = tuple(sorted(buckets))
+        # label value -> [per-bucket counts (+Inf last), sum]
+        self._series: Dict[str, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, label_value: str = "") -> None:
+        series = self._series.get(label_value)
+        if series is None:
+            series = self._series[label_value] = ([0] * (len(self.buckets) + 1), [0.0])
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1][0] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for label_value, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = _format_labels(self.label, label_value, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            cumulative += counts[-1]
+            labels = _format_labels(self.label, label_value, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            plain = _format_labels(self.label, label_value)
+            lines.append(f"{self.name}_sum{plain} {_format_value(total[0])}")
+            lines.append(f"{self.name}_count{plain} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Collection of metrics rendered together in Prometheus text format."""
+
+    def __init__(self) -> None:
+        self._metrics: List[Union[Counter, Histogram]] = []
+
+    def counter(self, name: str, help_text: str, label: Optional[str] = None) -> Counter:
+        metric = Counter(name, help_text, label)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+        label: Optional[str] = None,
+    ) -> Histogram:
+        metric = Histogram(name, help_text, buckets, label)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+REQUEST_LATENCY = registry.histogram(
+    "ui_request_duration_seconds", "HTTP request latency by route.", label="route"
+)
+INTENT_LATENCY = registry.histogram(
+    "ui_intent_duration_seconds", "Time spent applying each resolved intent.", label="intent"
+)
+UNMATCHED_UTTERANCES = registry.counter(
+    "ui_unmatched_utterances_total",
+    "Commands the rules could not fully match, by kind (help fallback or unknown product).",
+    label="kind",
+)
+CART_ITEMS = registry.histogram(
+    "ui_cart_items",
+    "Units in the cart after each handled message.",
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100),
+)
+STATE_BYTES = registry.histogram(
+    "ui_state_bytes",
+    "Size of /state response bodies in bytes.",
+    buckets=(256, 512, 1024, 2048, 4096, 8192, 16384, 65536),
+)
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware that records request latency per matched route.
+
+    The label is "<METHOD> <route path>" as resolved by the router, so
+    unknown URLs collapse into "<METHOD> other" instead of growing the
+    label set.
+    """
+
+    def __init__(self, app: Callable[..., Awaitable[None]], histogram: Histogram = REQUEST_LATENCY) -> None:
+        self.app = app
+        self.histogram = histogram
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            path = getattr(scope.get("route"), "path", None) or "other"
+            self.histogram.observe(time.perf_counter() - start, f"{scope['method']} {path}")
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import argparse
+import json
+from typing import Dict, FrozenSet, Iterable, List, Sequence, Tuple
+
+
+class CooccurrenceIndex:
+    """
+    "Frequently bought together" index built from historical carts.
+
+    - `pairs[a][b]` is how many carts contained both a and b (a sparse
+      item-to-item matrix; only co-occurring pairs are stored).
+    - `top[a]` is the precomputed top-k of `pairs[a]` by count, so serving
+      a recommendation is a dict lookup plus a filter over k items.
+
+    `add_cart` updates the counts and recomputes only the rows it touched.
+    """
+
+    def __init__(self, k: int = 3) -> None:
+        self.k = k
+        self.pairs: Dict[str, Dict[str, int]] = {}
+        self.top: Dict[str, Tuple[str, ...]] = {}
+
+    @classmethod
+    def build(cls, carts: Iterable[Iterable[str]], k: int = 3) -> "CooccurrenceIndex":
+        index = cls(k=k)
+        for cart in carts:
+            index._count(cart)
+        for item in index.pairs:
+            index._rank(item)
+        return index
+
+    def add_cart(self, cart: Iterable[str], seen: Iterable[str] = ()) -> None:
+        """
+        Fold one more cart into the index without a full rebuild.
+
+        Pairs made only of `seen` items (already counted, e.g. earlier in
+        the same session) are skipped, so a cart is never counted twice.
+        """
+        for item in self._count(cart, frozenset(seen)):
+            self._rank(item)
+
+    def recommend(self, product_id: str, exclude: Iterable[str] = ()) -> List[str]:
+        """Top co-bought products for `product_id`, skipping `exclude`."""
+        skip = set(exclude)
+        return [p for p in self.top.get(product_id, ()) if p not in skip][: self.k]
+
+    def recommend_for_cart(self, cart: Sequence[str]) -> List[str]:
+        """Merge recommendations for every item in `cart`, best-ranked first."""
+        in_cart = set(cart)
+        picked: List[str] = []
+        # Round-robin over the cart's rows so one item can't crowd out the rest.
+        for rank in range(self.k * 2):
+            for item in cart:
+                row = self.top.get(item, ())
+                if rank < len(row) and row[rank] not in in_cart and row[rank] not in picked:
+                    picked.append(row[rank])
+                    if len(picked) == self.k:
+                        return picked
+        return picked
+
+    def _count(self, cart: Iterable[str], seen: FrozenSet[str] = frozenset()) -> List[str]:
+        items = sorted(set(cart))
+        touched = set()
+        for i, a in enumerate(items):
+            for b in items[i + 1:]:
+                if a in seen and b in seen:
+                    continue
+                row_a = self.pairs.setdefault(a, {})
+                row_a[b] = row_a.get(b, 0) + 1
+                row_b = self.pairs.setdefault(b, {})
+                row_b[a] = row_b.get(a, 0) + 1
+                touched.update((a, b))
+        return sorted(touched)
+
+    def _rank(self, item: str) -> None:
+        row = self.pairs.get(item, {})
+        # Keep 2k so exclusions (items already in the cart) rarely empty the list.
+        ranked = sorted(row.items(), key=lambda kv: (-kv[1], kv[0]))[: self.k * 2]
+        self.top[item] = tuple(p for p, _ in ranked)
+
+    # --- Persistence ---
+
+    def to_dict(self) -> dict:
+        return {"k": self.k, "pairs": self.pairs}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CooccurrenceIndex":
+        index = cls(k=data.get("k", 3))
+        index.pairs = {a: dict(row) for a, row in data.get("pairs", {}).items()}
+        for item in index.pairs:
+            index._rank(item)
+        return index
+
+    def save(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2, sort_keys=True)
+            f.write("\n")
+
+    @classmethod
+    def load(cls, path: str) -> "CooccurrenceIndex":
+        with open(path, encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+
+def read_carts(path: str) -> Iterable[List[str]]:
+    """Read historical carts: one JSON object per line with a "cart" id list."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)["cart"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build the frequently-bought-together index")
+    parser.add_argument("carts", type=str, help="JSONL file of historical carts")
+    parser.add_argument("-o", "--output", type=str, default="recommendations.json")
+    parser.add_argument("-k", type=int, default=3, help="Recommendations per product")
+    args = parser.parse_args()
+
+    index = CooccurrenceIndex.build(read_carts(args.carts), k=args.k)
+    index.save(args.output)
+    print(f"Indexed {len(index.pairs)} products into {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import hashlib
+from typing import Dict, Tuple
+
+from ui_state import UIState
+
+
+class SerializedStateCache:
+    """
+    Caches the rendered /state body for the current state version.
+
+    The agent bumps its `version` on every mutation, so a poll against an
+    unchanged state is a dict lookup instead of a full model dump. Both the
+    pretty and compact renderings are cached independently.
+    """
+
+    def __init__(self) -> None:
+        self._version = -1
+        self._entries: Dict[bool, Tuple[bytes, str]] = {}
+
+    def render(self, state: UIState, version: int, compact: bool = False) -> Tuple[bytes, str]:
+        """Return (body, etag) for `state` at `version`."""
+        if version != self._version:
+            self._entries.clear()
+            self._version = version
+
+        entry = self._entries.get(compact)
+        if entry is None:
+            state_json = state.model_dump_json() if compact else state.model_dump_json(indent=2)
+            body = f"<pre>{state_json}</pre>".encode("utf-8")
+            # Content hash rather than the version number, so ETags stay
+            # valid (and never collide) across server restarts.
+            etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+            entry = (body, etag)
+            self._entries[compact] = entry
+        return entry
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import asyncio
+import gzip
+import hashlib
+import mimetypes
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+try:  # brotli is optional – we fall back to gzip / identity without it.
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+
+@dataclass
+class StaticAsset:
+    """
+    A single file loaded into memory together with its precompressed variants.
+
+    `encodings` maps a content-coding ("identity", "gzip", "br") to the
+    bytes we send and the strong ETag for that representation.
+    """
+
+    path: Path
+    media_type: str
+    mtime_ns: int
+    size: int
+    encodings: Dict[str, Tuple[bytes, str]] = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, path: Path) -> "StaticAsset":
+        stat = path.stat()
+        body = path.read_bytes()
+        media_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+        if media_type.startswith("text/"):
+            media_type += "; charset=utf-8"
+
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        encodings = {"identity": (body, f'"{digest}"')}
+        # mtime=0 keeps the gzip output byte-for-byte stable across restarts.
+        encodings["gzip"] = (gzip.compress(body, compresslevel=9, mtime=0), f'"{digest}-gz"')
+        if brotli is not None:
+            encodings["br"] = (brotli.compress(body, quality=11), f'"{digest}-br"')
+
+        return cls(
+            path=path,
+            media_type=media_type,
+            mtime_ns=stat.st_mtime_ns,
+            size=stat.st_size,
+            encodings=encodings,
+        )
+
+    def is_stale(self) -> bool:
+        """True if the file on disk no longer matches what we loaded."""
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return False
+        return stat.st_mtime_ns != self.mtime_ns or stat.st_size != self.size
+
+    def select(self, accept_encoding: Optional[str]) -> Tuple[str, bytes, str]:
+        """
+        Pick the best representation for an Accept-Encoding header.
+
+        The accepted coding with the highest q wins; br, gzip, identity is
+        only the tie-break order. If the client refuses everything we have
+        (e.g. "identity;q=0" alone), we still send identity rather than 406.
+        """
+        accepted = _parse_accept_encoding(accept_encoding)
+        best, best_q = "identity", 0.0
+        for coding in ("br", "gzip", "identity"):
+            q = accepted.get(coding, 0.0)
+            if coding in self.encodings and q > best_q:
+                best, best_q = coding, q
+        body, etag = self.encodings[best]
+        return best, body, etag
+
+
+class AssetCache:
+    """
+    In-memory store of static assets, keyed by name.
+
+    Everything is read and compressed once up front. In dev mode a small
+    background task polls the files and reloads an asset only when its
+    mtime or size changes.
+    """
+
+    def __init__(self, root: Path, names: Iterable[str], poll_interval: float = 1.0) -> None:
+        self.root = root
+        self.poll_interval = poll_interval
+        self._assets: Dict[str, StaticAsset] = {
+            name: StaticAsset.load(root / name) for name in names
+        }
+
+    def get(self, name: str) -> StaticAsset:
+        return self._assets[name]
+
+    def reload_changed(self) -> int:
+        """Reload any assets whose file changed on disk. Returns the count reloaded."""
+        reloaded = 0
+        for name, asset in list(self._assets.items()):
+            if asset.is_stale():
+                self._assets[name] = StaticAsset.load(asset.path)
+                reloaded += 1
+        return reloaded
+
+    async def watch(self) -> None:
+        """Dev-mode watcher loop; cancel the task to stop it."""
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            self.reload_changed()
+
+
+# q for identity when Accept-Encoding doesn't mention it (RFC 9110 §12.5.3).
+IMPLICIT_IDENTITY_Q = 0.001
+
+
+def _parse_accept_encoding(header: Optional[str]) -> Dict[str, float]:
+    """
+    Parse an Accept-Encoding header into {coding: q}.
+
+    Identity is acceptable unless the header refuses it explicitly, as
+    "identity;q=0" or through "*;q=0". When it is not listed at all it gets
+    IMPLICIT_IDENTITY_Q, so any compression the client asked for wins.
+    """
+    result: Dict[str, float] = {}
+    if not header:
+        return {"identity": IMPLICIT_IDENTITY_Q}
+
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        result[coding] = q
+
+    if "*" in result:
+        for coding in ("br", "gzip", "identity"):
+            result.setdefault(coding, result["*"])
+    result.setdefault("identity", IMPLICIT_IDENTITY_Q)
+    return result
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Weak comparison of an If-None-Match header against our ETag,
+    as required by RFC 9110 for conditional GETs.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
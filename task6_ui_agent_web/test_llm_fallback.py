@@ -0,0 +1,118 @@
+"""
+Tests for the LLM fallback, with a local FunctionModel in place of a real LLM.
+
+Run from this directory: python -m pytest -q test_llm_fallback.py
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Dict, List
+
+import httpx
+import pytest
+
+pytest.importorskip("pydantic_ai")
+
+from pydantic_ai.messages import ModelMessage, ModelResponse, ToolCallPart
+from pydantic_ai.models.function import AgentInfo, FunctionModel
+
+import backend
+from backend import CATALOG, CATEGORIES, UIAgent
+from llm_fallback import LLMFallback
+
+# What the stub model answers, keyed by the message the user typed.
+ACTIONS: Dict[str, dict] = {
+    "gimme earbuds": {"action": "add", "product_id": "p3"},
+    "grab phone": {"action": "add", "product_id": "p1"},
+    "fetch laptop": {"action": "add", "product_id": "p4"},
+}
+
+
+class StubModel:
+    """FunctionModel wrapper that records which messages reached the model."""
+
+    def __init__(self) -> None:
+        self.calls: List[str] = []
+        self.model = FunctionModel(self._respond)
+
+    def _respond(self, messages: List[ModelMessage], info: AgentInfo) -> ModelResponse:
+        prompt = messages[-1].parts[-1].content
+        text = prompt.rsplit("User message: ", 1)[-1]
+        self.calls.append(text)
+        args = ACTIONS.get(text, {"action": "none"})
+        return ModelResponse(parts=[ToolCallPart(info.output_tools[0].name, args)])
+
+
+@pytest.fixture
+def stub() -> StubModel:
+    return StubModel()
+
+
+def make_fallback(stub: StubModel, **kwargs) -> LLMFallback:
+    catalog = {pid: item.name for pid, item in CATALOG.items()}
+    return LLMFallback(stub.model, catalog=catalog, categories=CATEGORIES, **kwargs)
+
+
+def send(agent: UIAgent, message: str) -> str:
+    """Same path as POST /message: warm the fallback, then handle."""
+    asyncio.run(agent.warm_fallback([message]))
+    reply, _ = agent.handle_user_message(message)
+    return reply
+
+
+def test_miss_is_resolved_once_then_served_from_cache(stub: StubModel) -> None:
+    agent = UIAgent(fallback=make_fallback(stub))
+
+    send(agent, "gimme earbuds")
+    send(agent, "Gimme the earbuds, please")
+
+    assert stub.calls == ["gimme earbuds"]
+    assert [(item.product_id, item.quantity) for item in agent.state.cart] == [("p3", 2)]
+
+
+def test_special_commands_never_reach_the_model(stub: StubModel) -> None:
+    agent = UIAgent(fallback=make_fallback(stub))
+
+    send(agent, "undo, redo")
+
+    assert stub.calls == []
+    assert len(agent.fallback.cache) == 0
+
+
+def test_cache_evicts_least_recently_used(stub: StubModel) -> None:
+    fallback = make_fallback(stub, cache_size=2)
+    state = UIAgent().state
+
+    asyncio.run(fallback.resolve("gimme earbuds", state))
+    asyncio.run(fallback.resolve("grab phone", state))
+    assert fallback.lookup("gimme earbuds")[0]  # now the most recently used
+    asyncio.run(fallback.resolve("fetch laptop", state))
+
+    assert len(fallback.cache) == 2
+    assert fallback.knows("gimme earbuds")
+    assert not fallback.knows("grab phone")
+    assert fallback.knows("fetch laptop")
+
+
+def test_frequent_phrase_is_promoted_and_exported(
+    stub: StubModel, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    fallback = make_fallback(stub, promote_after=2)
+    monkeypatch.setattr(backend, "agent", UIAgent(fallback=fallback))
+
+    for _ in range(3):
+        send(backend.agent, "gimme earbuds")
+
+    assert stub.calls == ["gimme earbuds"]
+    assert "gimme earbuds" in fallback.rules
+    assert "gimme earbuds" not in fallback.cache
+
+    async def get_rules() -> httpx.Response:
+        transport = httpx.ASGITransport(app=backend.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/fallback/rules")
+
+    response = asyncio.run(get_rules())
+    assert response.status_code == 200
+    assert response.json() == [{"utterance": "gimme earbuds", "intent": "add", "arg": "p3"}]